@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Per-frame cost benchmark for the visualizations in song_to_waveform.py
+
+# Track lengths (in seconds) of the synthetic audio to benchmark against
+TRACK_DURATIONS = [30, 120, 600]
+# Number of frames to time per visualization and track length
+FRAMES_PER_RUN = 60
+# Number of outputs and track length (in seconds) for the multi-format comparison
+MULTI_FORMAT_OUTPUTS = 3
+MULTI_FORMAT_DURATION = 10
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from scipy.io import wavfile
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from song_to_waveform import (VISUALIZATIONS, build_frame_data,
+                              setup_visualization, make_frame_renderer, create_waveform_video,
+                              create_multi_format_videos)
+
+def synthesize_track(duration, sr=22050, seed=0):
+    """Create a noisy tone sweep so every visualization has something to show."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sr)) / sr
+    sweep = np.sin(2 * np.pi * (110 + (40 * t) % 2000) * t)
+    return (0.5 * sweep + 0.1 * rng.standard_normal(len(t))).astype(np.float32), sr
+
+def benchmark_visualization(y, sr, visualization, fps=30, frames=FRAMES_PER_RUN):
+    """
+    Time the precomputation and the per-frame cost of one visualization.
+    
+    Frames are rendered with make_frame_renderer, as both exporters do.
+    
+    Returns:
+        tuple: (setup seconds, lookup ms per frame, full frame ms per frame)
+    """
+    start = time.perf_counter()
+    get_frame_data = build_frame_data(y, sr, fps, visualization=visualization)
+    setup_time = time.perf_counter() - start
+    
+    fig, ax = plt.subplots(figsize=(16, 9), facecolor='black')
+    draw, artists = setup_visualization(ax, visualization)
+    render = make_frame_renderer(fig, artists)
+    
+    # Sample frames spread over the whole track
+    duration = len(y) / sr
+    times = np.linspace(0, duration, frames, endpoint=False)
+    
+    start = time.perf_counter()
+    for t in times:
+        get_frame_data(t)
+    lookup_ms = (time.perf_counter() - start) / frames * 1000
+    
+    start = time.perf_counter()
+    for t in times:
+        draw(get_frame_data(t))
+        render()
+    frame_ms = (time.perf_counter() - start) / frames * 1000
+    
+    plt.close(fig)
+    return setup_time, lookup_ms, frame_ms
+
+def benchmark_multi_format(visualization, duration=MULTI_FORMAT_DURATION,
+                           outputs=MULTI_FORMAT_OUTPUTS, fps=30):
+    """
+    Time several separate exports against one multi-format export, end to end.
+    
+    The separate path runs create_waveform_video once per output; the shared path
+    runs create_multi_format_videos once with the same number of 1600x900 specs,
+    so both rasterize and encode the same pixels. Both include audio decoding,
+    AAC encoding and x264 encoding of every output.
+    
+    Returns:
+        tuple: (separate seconds, shared seconds)
+    """
+    temp_dir = tempfile.mkdtemp()
+    try:
+        y, sr = synthesize_track(duration)
+        audio_path = os.path.join(temp_dir, "track.wav")
+        wavfile.write(audio_path, sr, y)
+        
+        start = time.perf_counter()
+        for i in range(outputs):
+            create_waveform_video(audio_path, os.path.join(temp_dir, f"separate_{i}.mp4"),
+                                  fps=fps, visualization=visualization)
+        separate_time = time.perf_counter() - start
+        
+        specs = [{'output_path': os.path.join(temp_dir, f"shared_{i}.mp4"), 'size': (1600, 900)}
+                 for i in range(outputs)]
+        start = time.perf_counter()
+        create_multi_format_videos(audio_path, specs, fps=fps, visualization=visualization)
+        shared_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    return separate_time, shared_time
+
+def main():
+    print(f"{'visualization':<14}{'track (s)':>10}{'setup (s)':>12}"
+          f"{'lookup (ms)':>14}{'frame (ms)':>13}")
+    for duration in TRACK_DURATIONS:
+        y, sr = synthesize_track(duration)
+        for visualization in VISUALIZATIONS:
+            setup_time, lookup_ms, frame_ms = benchmark_visualization(y, sr, visualization)
+            print(f"{visualization:<14}{duration:>10}{setup_time:>12.2f}"
+                  f"{lookup_ms:>14.3f}{frame_ms:>13.1f}")
+    
+    print(f"\nExporting {MULTI_FORMAT_OUTPUTS} videos from a {MULTI_FORMAT_DURATION} s track, "
+          f"including encoding")
+    results = []
+    for visualization in VISUALIZATIONS:
+        results.append((visualization, *benchmark_multi_format(visualization)))
+    print(f"{'visualization':<14}{'separate (s)':>14}{'shared (s)':>12}{'shared / one':>14}")
+    for visualization, separate_time, shared_time in results:
+        # How many single renders the shared export costs (1.0 would be ideal)
+        single_time = separate_time / MULTI_FORMAT_OUTPUTS
+        print(f"{visualization:<14}{separate_time:>14.2f}{shared_time:>12.2f}"
+              f"{shared_time / single_time:>14.2f}")
+
+if __name__ == "__main__":
+    main()
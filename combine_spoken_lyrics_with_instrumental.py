@@ -5,11 +5,146 @@ SPEECH_INPUT = "" # replace with your full filepath to your lyrics file (/Users/
 INSTRUMENTAL_INPUT = "" # replace with your full filepath to your instrumental file (/Users/you/.../instrumental_version.mp3)
 OUTPUT_FILENAME = "" # replace with your full filepath to your final audio file (/Users/you/.../reconstructed_song.mp3)
 
+import numpy as np
+from scipy.signal import lfilter
 from pydub import AudioSegment
 
+def segment_to_array(segment):
+    """Convert an AudioSegment to a float array of shape (samples, channels) in -1..1."""
+    samples = np.array(segment.get_array_of_samples(), dtype=np.float64)
+    samples = samples.reshape(-1, segment.channels)
+    return samples / float(1 << (8 * segment.sample_width - 1))
+
+def array_to_segment(samples, frame_rate, sample_width):
+    """Convert a float array of shape (samples, channels) back to an AudioSegment."""
+    scale = float(1 << (8 * sample_width - 1))
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}[sample_width]
+    ints = np.clip(np.round(samples * scale), -scale, scale - 1).astype(dtype)
+    return AudioSegment(data=ints.tobytes(), sample_width=sample_width,
+                        frame_rate=frame_rate, channels=samples.shape[1])
+
+def one_pole_coefficient(time_ms, rate):
+    """Smoothing coefficient of a one-pole filter with the given time constant."""
+    if time_ms <= 0:
+        return 0.0
+    return float(np.exp(-1.0 / (time_ms / 1000.0 * rate)))
+
+def compute_ducking_gain(speech, frame_rate, duck_db=8.0, threshold_db=-40.0,
+                         attack_ms=20, release_ms=400, block_ms=10):
+    """
+    Compute a per-sample gain that ducks the instrumental while speech is present.
+    
+    The speech level is measured on short RMS blocks in one vectorized pass, then
+    an envelope follower runs over the blocks. It uses the attack time while the
+    gain reduction is rising and the release time while it is falling, always
+    starting from the current level, so short gaps between words don't let the
+    instrumental pump back up. The target only switches between 0 and duck_db,
+    so within each run of constant target the follower is evaluated in closed
+    form as a vectorized exponential; only the level at run boundaries is
+    carried over in a loop.
+    
+    Args:
+        speech (np.ndarray): Speech samples (samples, channels), already positioned
+        frame_rate (int): Sample rate of the speech
+        duck_db (float): How far to lower the instrumental under speech, in dB
+        threshold_db (float): Speech block level (dBFS) above which ducking starts
+        attack_ms (float): Time for the ducking to engage
+        release_ms (float): Time for the instrumental to come back up
+        block_ms (float): Length of the RMS blocks used by the envelope follower
+    
+    Returns:
+        np.ndarray: Linear gain for every sample, shape (samples,)
+    """
+    block_size = max(1, int(frame_rate * block_ms / 1000))
+    num_blocks = -(-len(speech) // block_size)
+    
+    # RMS of every block across all channels
+    padded = np.zeros((num_blocks * block_size, speech.shape[1]))
+    padded[:len(speech)] = speech
+    power = np.mean(padded.reshape(num_blocks, -1) ** 2, axis=1)
+    level_db = 10 * np.log10(np.maximum(power, 1e-12))
+    
+    # Gain reduction target in dB, then attack/release envelope follower
+    target = np.where(level_db > threshold_db, duck_db, 0.0)
+    block_rate = frame_rate / block_size
+    attack = one_pole_coefficient(attack_ms, block_rate)
+    release = one_pole_coefficient(release_ms, block_rate)
+    reduction_db = np.empty(num_blocks)
+    changes = np.flatnonzero(np.diff(target)) + 1
+    run_starts = np.concatenate([[0], changes])
+    run_ends = np.concatenate([changes, [num_blocks]])
+    current = 0.0
+    for start, end in zip(run_starts, run_ends):
+        # current[n] = value + (current[0] - value) * coeff ** n within the run
+        value = target[start]
+        coeff = attack if value > current else release
+        steps = np.arange(1, end - start + 1)
+        reduction_db[start:end] = value + (current - value) * coeff ** steps
+        current = reduction_db[end - 1]
+    
+    # Interpolate block gains to sample resolution
+    block_centers = (np.arange(num_blocks) + 0.5) * block_size
+    gain = 10 ** (-reduction_db / 20)
+    return np.interp(np.arange(len(speech)), block_centers, gain)
+
+def k_weighting_filters(rate):
+    """Return the two ITU-R BS.1770 K-weighting biquads (b, a) for the given sample rate."""
+    # Stage 1: high shelf modelling the acoustic effect of the head
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    
+    # Stage 2: high pass (RLB weighting)
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0],
+                [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return shelf, highpass
+
+def integrated_loudness(samples, frame_rate):
+    """
+    Measure the integrated loudness of a mix in LUFS (ITU-R BS.1770).
+    
+    Args:
+        samples (np.ndarray): Audio samples (samples, channels) in -1..1
+        frame_rate (int): Sample rate
+    
+    Returns:
+        float: Integrated loudness in LUFS, or -inf for silence
+    """
+    weighted = samples
+    for b, a in k_weighting_filters(frame_rate):
+        weighted = lfilter(b, a, weighted, axis=0)
+    
+    # Mean square of 400 ms blocks with 75% overlap, from a running sum
+    block_size = int(0.4 * frame_rate)
+    step = int(0.1 * frame_rate)
+    if len(weighted) < block_size:
+        return float('-inf')
+    cumulative = np.concatenate([np.zeros((1, weighted.shape[1])),
+                                 np.cumsum(weighted ** 2, axis=0)])
+    starts = np.arange(0, len(weighted) - block_size + 1, step)
+    block_power = ((cumulative[starts + block_size] - cumulative[starts]) / block_size).sum(axis=1)
+    block_loudness = -0.691 + 10 * np.log10(np.maximum(block_power, 1e-12))
+    
+    # Absolute gate at -70 LUFS, then relative gate 10 LU below the gated mean
+    gated = block_power[block_loudness > -70.0]
+    if len(gated) == 0:
+        return float('-inf')
+    relative_gate = -0.691 + 10 * np.log10(np.mean(gated)) - 10.0
+    gated = block_power[(block_loudness > -70.0) & (block_loudness > relative_gate)]
+    return float(-0.691 + 10 * np.log10(np.mean(gated)))
+
 def combine_audio_tracks(speech_path, instrumental_path, output_path, 
                          speech_volume_adj=0, instrumental_volume_adj=0, 
-                         speech_position=0):
+                         speech_position=0, duck_db=0, duck_threshold_db=-40.0,
+                         duck_attack_ms=20, duck_release_ms=400,
+                         target_lufs=None, max_peak_db=-1.0):
     """
     Combine a vocal track with an instrumental track.
     
@@ -20,6 +155,12 @@ def combine_audio_tracks(speech_path, instrumental_path, output_path,
         speech_volume_adj (int): dB adjustment for speech volume (positive to increase)
         instrumental_volume_adj (int): dB adjustment for instrumental volume
         speech_position (int): Position in milliseconds to place the speech
+        duck_db (float): dB to lower the instrumental while speech plays (0 disables ducking)
+        duck_threshold_db (float): Speech level in dBFS above which ducking starts
+        duck_attack_ms (float): Time for the ducking to engage
+        duck_release_ms (float): Time for the instrumental to come back up
+        target_lufs (float): Integrated loudness to normalize the mix to (None to skip)
+        max_peak_db (float): Peak ceiling in dBFS that normalization will not push past
     """
     # Load both audio files
     speech = AudioSegment.from_wav(speech_path)
@@ -32,17 +173,52 @@ def combine_audio_tracks(speech_path, instrumental_path, output_path,
     if instrumental_volume_adj != 0:
         instrumental = instrumental - instrumental_volume_adj
     
-    # Make sure the instrumental is at least as long as the speech
-    if len(instrumental) < len(speech) + speech_position:
-        # Extend the instrumental by looping or padding with silence
-        padding = AudioSegment.silent(duration=len(speech) + speech_position - len(instrumental))
-        instrumental = instrumental + padding
+    # Match the speech format to the instrumental so the samples line up
+    frame_rate = instrumental.frame_rate
+    sample_width = instrumental.sample_width
+    speech = (speech.set_frame_rate(frame_rate)
+                    .set_channels(instrumental.channels)
+                    .set_sample_width(sample_width))
+    
+    speech_samples = segment_to_array(speech)
+    instrumental_samples = segment_to_array(instrumental)
+    
+    # Make sure the instrumental is at least as long as the speech, padding with silence
+    offset = int(speech_position * frame_rate / 1000)
+    length = max(len(instrumental_samples), offset + len(speech_samples))
+    positioned_speech = np.zeros((length, instrumental.channels))
+    positioned_speech[offset:offset + len(speech_samples)] = speech_samples
+    padded_instrumental = np.zeros_like(positioned_speech)
+    padded_instrumental[:len(instrumental_samples)] = instrumental_samples
+    
+    # Duck the instrumental under the speech
+    if duck_db > 0:
+        gain = compute_ducking_gain(positioned_speech, frame_rate, duck_db=duck_db,
+                                    threshold_db=duck_threshold_db,
+                                    attack_ms=duck_attack_ms, release_ms=duck_release_ms)
+        padded_instrumental *= gain[:, np.newaxis]
     
     # Overlay the speech on top of the instrumental
-    combined = instrumental.overlay(speech, position=speech_position)
+    combined = padded_instrumental + positioned_speech
+    
+    # Normalize the final mix to the target loudness
+    if target_lufs is not None:
+        loudness = integrated_loudness(combined, frame_rate)
+        if np.isfinite(loudness):
+            gain_db = target_lufs - loudness
+            peak = np.max(np.abs(combined))
+            peak_db = 20 * np.log10(peak) if peak > 0 else float('-inf')
+            if peak_db + gain_db > max_peak_db:
+                gain_db = max_peak_db - peak_db
+                print(f"Warning: limiting gain to keep peaks below {max_peak_db} dBFS; "
+                      f"mix will be {loudness + gain_db:.1f} LUFS instead of {target_lufs} LUFS")
+            combined *= 10 ** (gain_db / 20)
+            print(f"Normalized mix from {loudness:.1f} LUFS to {loudness + gain_db:.1f} LUFS")
+        else:
+            print("Warning: mix is silent, skipping loudness normalization")
     
     # Export the final result
-    combined.export(output_path, format="mp3")
+    array_to_segment(combined, frame_rate, sample_width).export(output_path, format="mp3")
     
     print(f"Successfully combined tracks and saved to {output_path}")
     return output_path
@@ -55,8 +231,10 @@ def main():
         OUTPUT_FILENAME,
         speech_volume_adj=0,  # Adjust these values as needed
         instrumental_volume_adj=0, # Adjust these values as needed
-        speech_position=0 # Adjust these values as needed
+        speech_position=0, # Adjust these values as needed
+        duck_db=8,  # Lower the instrumental by this many dB under the speech (0 to disable)
+        target_lufs=-14  # Loudness of the final mix (None to skip normalization)
     )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -8,24 +8,266 @@ import numpy as np
 import librosa
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib.collections import LineCollection
+from matplotlib.collections import LineCollection, PolyCollection
 from moviepy.editor import VideoClip, AudioFileClip
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
 import os
+import shutil
+import tempfile
 
-def create_waveform_video(audio_path, output_path, fps=30, video_duration=None, 
-                         segment_length=0.1, background_color='black', 
-                         first_ten_seconds=False):
+# Available visualization modes
+VISUALIZATIONS = ('waveform', 'bars', 'spectrogram', 'radial')
+
+# Dynamic range (in dB) mapped onto the 0..1 spectrum scale
+SPECTRUM_TOP_DB = 80.0
+
+def make_frame_renderer(fig, artists):
     """
-    Create a video with an animated waveform visualization from an audio file.
+    Draw the static parts of a figure once and return a fast frame renderer.
+    
+    The background and axes are cached after a single full draw; each call
+    restores that cache and redraws only the animated artists.
+    
+    Args:
+        fig (matplotlib.figure.Figure): Figure to render
+        artists (list): Artists that change from frame to frame
+    
+    Returns:
+        function: render() returning the current frame as an RGB numpy array
+    """
+    for artist in artists:
+        artist.set_animated(True)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+    
+    def render():
+        fig.canvas.restore_region(background)
+        for artist in artists:
+            artist.axes.draw_artist(artist)
+        return np.array(fig.canvas.buffer_rgba())[:, :, :3]
+    
+    return render
+
+def compute_spectrum(y, sr, fps, n_fft=2048):
+    """
+    Compute the magnitude spectrum of the whole track in a single STFT pass.
+    
+    The hop length is one video frame, so column i of the result is the
+    spectrum at time i / fps.
+    
+    Args:
+        y (np.ndarray): Audio samples
+        sr (int): Sample rate
+        fps (int): Frames per second of the output video
+        n_fft (int): FFT window size
+    
+    Returns:
+        tuple: (spectrum, hop_length) where spectrum has shape
+            (1 + n_fft // 2, num_columns) with values scaled to 0..1
+    """
+    hop_length = max(1, int(sr / fps))
+    magnitude = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+    spectrum_db = librosa.amplitude_to_db(magnitude, ref=np.max, top_db=SPECTRUM_TOP_DB)
+    spectrum = (spectrum_db + SPECTRUM_TOP_DB) / SPECTRUM_TOP_DB
+    return spectrum.astype(np.float32), hop_length
+
+def group_into_bands(spectrum, sr, n_fft, num_bands=64, fmin=30.0):
+    """
+    Average STFT bins into logarithmically spaced frequency bands.
+    
+    Works on the full spectrum matrix at once, so every frame is grouped in
+    one vectorized call. Low bands narrower than a single FFT bin are merged,
+    so the result may have fewer than num_bands rows.
+    
+    Args:
+        spectrum (np.ndarray): Spectrum from compute_spectrum
+        sr (int): Sample rate
+        n_fft (int): FFT window size used for the spectrum
+        num_bands (int): Number of bands to produce
+        fmin (float): Lowest band edge in Hz
+    
+    Returns:
+        np.ndarray: Band magnitudes with shape (bands, num_columns)
+    """
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    edges = np.geomspace(fmin, sr / 2, num_bands + 1)
+    bins = np.unique(np.searchsorted(freqs, edges))
+    bins = bins[bins < len(freqs)]
+    
+    sums = np.add.reduceat(spectrum[:bins[-1]], bins[:-1], axis=0)
+    counts = np.diff(bins)[:, np.newaxis]
+    return (sums / counts).astype(np.float32)
+
+def build_frame_data(y, sr, fps, visualization='waveform', segment_length=0.1,
+                     num_display_points=1000, num_bands=64, n_fft=2048,
+                     spectrogram_seconds=5.0):
+    """
+    Precompute everything a visualization needs and return a per-frame lookup.
+    
+    Spectrum based modes run one STFT over the whole track up front, so the
+    returned function only slices into precomputed arrays and its cost does not
+    depend on the track length.
+    
+    Args:
+        y (np.ndarray): Audio samples
+        sr (int): Sample rate
+        fps (int): Frames per second of the output video
+        visualization (str): One of VISUALIZATIONS
+        segment_length (float): Length of audio segment to visualize in seconds (waveform)
+        num_display_points (int): Number of points drawn for the waveform
+        num_bands (int): Number of frequency bands (bars, spectrogram, radial)
+        n_fft (int): FFT window size (bars, spectrogram, radial)
+        spectrogram_seconds (float): Length of scrolling history (spectrogram)
+    
+    Returns:
+        function: get_frame_data(t) returning the array to draw at time t
+    """
+    if visualization not in VISUALIZATIONS:
+        raise ValueError(f"Unknown visualization '{visualization}', "
+                         f"expected one of {', '.join(VISUALIZATIONS)}")
+    
+    if visualization == 'waveform':
+        samples_per_segment = int(segment_length * sr)
+        half_segment = samples_per_segment // 2
+        
+        def get_waveform(t):
+            # Get audio segment around current time
+            current_sample = int(t * sr)
+            start_sample = max(0, current_sample - half_segment)
+            end_sample = min(len(y), current_sample + half_segment)
+            segment = y[start_sample:end_sample]
+            
+            # Resample by taking evenly spaced points
+            if len(segment) > num_display_points:
+                indices = np.linspace(0, len(segment) - 1, num_display_points, dtype=int)
+                segment = segment[indices]
+            return segment
+        
+        return get_waveform
+    
+    print(f"Computing spectrum for '{visualization}' visualization...")
+    spectrum, hop_length = compute_spectrum(y, sr, fps, n_fft=n_fft)
+    bands = group_into_bands(spectrum, sr, n_fft, num_bands=num_bands)
+    num_columns = bands.shape[1]
+    
+    def column_index(t):
+        return min(num_columns - 1, max(0, int(round(t * sr / hop_length))))
+    
+    if visualization == 'spectrogram':
+        # Pad with silence on the left so every window is a fixed-size slice
+        history = max(1, int(spectrogram_seconds * fps))
+        padded = np.concatenate(
+            [np.zeros((bands.shape[0], history - 1), dtype=bands.dtype), bands], axis=1)
+        
+        def get_spectrogram(t):
+            i = column_index(t)
+            return padded[:, i:i + history]
+        
+        return get_spectrogram
+    
+    def get_bands(t):
+        return bands[:, column_index(t)]
+    
+    return get_bands
+
+def setup_visualization(ax, visualization='waveform', color='#00AAFF',
+                        background_color='black'):
+    """
+    Configure the axes for a visualization and return its draw function.
+    
+    Args:
+        ax (matplotlib.axes.Axes): Axes to draw into
+        visualization (str): One of VISUALIZATIONS
+        color (str): Color of the visualization
+        background_color (str): Background color of the axes
+    
+    Returns:
+        tuple: (draw, artists) where draw(frame_data) updates the artists from
+            build_frame_data output and artists are the ones that change per frame
+    """
+    ax.set_facecolor(background_color)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    
+    if visualization == 'waveform':
+        ax.set_ylim(-0.8, 0.8)
+        ax.set_xlim(0, 1)  # Normalized x-axis from 0 to 1
+        
+        # Initialize empty line collection
+        line = LineCollection([], linewidths=3, alpha=1.0, colors=color)
+        ax.add_collection(line)
+        
+        def draw_waveform(segment):
+            # Create x coordinates (normalized from 0 to 1)
+            x = np.linspace(0, 1, len(segment))
+            
+            # Create segments for the line collection
+            points = np.array([x, segment]).T.reshape(-1, 1, 2)
+            line.set_segments(np.concatenate([points[:-1], points[1:]], axis=1))
+        
+        return draw_waveform, [line]
+    
+    if visualization == 'bars':
+        ax.set_ylim(0, 1)
+        ax.set_xlim(0, 1)
+        bars = PolyCollection([], facecolors=color, edgecolors='none')
+        ax.add_collection(bars)
+        
+        def draw_bars(levels):
+            # Build one rectangle per band: (bands, 4 corners, xy)
+            n = len(levels)
+            left = np.arange(n) / n
+            right = left + 0.8 / n
+            verts = np.empty((n, 4, 2))
+            verts[:, :, 0] = np.stack([left, left, right, right], axis=1)
+            verts[:, 0, 1] = verts[:, 3, 1] = 0
+            verts[:, 1, 1] = verts[:, 2, 1] = levels
+            bars.set_verts(verts)
+        
+        return draw_bars, [bars]
+    
+    if visualization == 'spectrogram':
+        image = ax.imshow(np.zeros((2, 2)), origin='lower', aspect='auto',
+                          cmap='magma', vmin=0, vmax=1, extent=(0, 1, 0, 1),
+                          interpolation='nearest')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        
+        def draw_spectrogram(window):
+            image.set_data(window)
+        
+        return draw_spectrogram, [image]
+    
+    if visualization == 'radial':
+        ax.set_xlim(-1, 1)
+        ax.set_ylim(-1, 1)
+        ax.set_aspect('equal', adjustable='box')
+        line, = ax.plot([], [], color=color, linewidth=3)
+        
+        def draw_radial(levels):
+            # Mirror the bands so the shape is symmetric, then close the loop
+            radius = 0.3 + 0.6 * np.concatenate([levels, levels[::-1], levels[:1]])
+            theta = np.linspace(0, 2 * np.pi, len(radius)) + np.pi / 2
+            line.set_data(radius * np.cos(theta), radius * np.sin(theta))
+        
+        return draw_radial, [line]
+    
+    raise ValueError(f"Unknown visualization '{visualization}', "
+                     f"expected one of {', '.join(VISUALIZATIONS)}")
+
+def load_audio(audio_path, video_duration=None, first_ten_seconds=False):
+    """
+    Load an audio file and work out how long the video should be.
     
     Args:
         audio_path (str): Path to input audio file
-        output_path (str): Path where the output video will be saved
-        fps (int): Frames per second for the output video
         video_duration (float): Duration of video in seconds (defaults to audio length)
-        segment_length (float): Length of audio segment to visualize in seconds
-        background_color (str): Background color of the video
-        first_ten_seconds (bool): If True, only output the first 10 seconds
+        first_ten_seconds (bool): If True, only keep the first 10 seconds
+    
+    Returns:
+        tuple: (y, sr, audio_duration, video_duration)
     """
     print(f"Loading audio file: {audio_path}")
     
@@ -47,84 +289,44 @@ def create_waveform_video(audio_path, output_path, fps=30, video_duration=None,
     else:
         video_duration = min(video_duration, audio_duration)
     
-    # Calculate samples per frame
-    samples_per_frame = int(sr / fps)
-    
-    # Calculate samples per segment
-    samples_per_segment = int(segment_length * sr)
-    
-    # Calculate total number of frames
-    total_frames = int(video_duration * fps)
+    return y, sr, audio_duration, video_duration
+
+def create_waveform_video(audio_path, output_path, fps=30, video_duration=None, 
+                         segment_length=0.1, background_color='black', 
+                         first_ten_seconds=False, visualization='waveform'):
+    """
+    Create a video with an animated waveform visualization from an audio file.
     
-    # Number of points to display in the waveform (reduced for less detail)
-    num_display_points = 1000
+    Args:
+        audio_path (str): Path to input audio file
+        output_path (str): Path where the output video will be saved
+        fps (int): Frames per second for the output video
+        video_duration (float): Duration of video in seconds (defaults to audio length)
+        segment_length (float): Length of audio segment to visualize in seconds
+        background_color (str): Background color of the video
+        first_ten_seconds (bool): If True, only output the first 10 seconds
+        visualization (str): 'waveform', 'bars', 'spectrogram' or 'radial'
+    """
+    y, sr, audio_duration, video_duration = load_audio(
+        audio_path, video_duration=video_duration, first_ten_seconds=first_ten_seconds)
     
-    # Custom function to convert matplotlib figure to numpy array
-    def fig_to_numpy(fig):
-        # Draw the figure
-        fig.canvas.draw()
-        
-        # Get the RGBA buffer from the figure
-        w, h = fig.canvas.get_width_height()
-        buf = np.frombuffer(fig.canvas.tostring_argb(), dtype=np.uint8)
-        buf.shape = (h, w, 4)
-        
-        # Convert ARGB to RGB
-        buf = np.roll(buf, -1, axis=2)[:,:,:3]
-        return buf
+    # Precompute the visualization data once for the whole track
+    get_frame_data = build_frame_data(y, sr, fps, visualization=visualization,
+                                      segment_length=segment_length)
     
     # Set up the figure for plotting
     fig, ax = plt.subplots(figsize=(16, 9), facecolor=background_color)
-    ax.set_facecolor(background_color)
-    ax.set_ylim(-0.8, 0.8)
-    ax.set_xlim(0, 1)  # Normalized x-axis from 0 to 1
-    ax.set_xticks([])
-    ax.set_yticks([])
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    
-    # Initialize empty line collection
-    line = LineCollection([], linewidths=3, alpha=1.0)
-    ax.add_collection(line)
+    draw, artists = setup_visualization(ax, visualization, color='#00AAFF',  # Bright blue color
+                                        background_color=background_color)
+    render = make_frame_renderer(fig, artists)
     
     # No clock/title at the top
     
     def make_frame(t):
-        # Calculate current position in audio
-        current_time = t
-        current_sample = int(current_time * sr)
+        draw(get_frame_data(t))
         
-        # Get audio segment around current time
-        half_segment = samples_per_segment // 2
-        start_sample = max(0, current_sample - half_segment)
-        end_sample = min(len(y), current_sample + half_segment)
-        
-        # Extract audio segment
-        segment = y[start_sample:end_sample]
-        
-        # Resample to desired display points if needed
-        if len(segment) > num_display_points:
-            # Resample by taking evenly spaced points
-            indices = np.linspace(0, len(segment) - 1, num_display_points, dtype=int)
-            segment = segment[indices]
-        
-        # Create x coordinates (normalized from 0 to 1)
-        x = np.linspace(0, 1, len(segment))
-        
-        # Create segments for the line collection
-        points = np.array([x, segment]).T.reshape(-1, 1, 2)
-        segments = np.concatenate([points[:-1], points[1:]], axis=1)
-        
-        # Use single blue color for waveform
-        line.set_segments(segments)
-        line.set_color('#00AAFF')  # Bright blue color
-        
-        # No clock/title update needed
-        
-        # Convert the matplotlib figure to an RGB frame
-        return fig_to_numpy(fig)
+        # Redraw the animated artists and return the RGB frame
+        return render()
     
     # Create MoviePy clip
     animation_clip = VideoClip(make_frame, duration=video_duration)
@@ -153,6 +355,133 @@ def create_waveform_video(audio_path, output_path, fps=30, video_duration=None,
     print(f"Video created successfully: {output_path}")
     return output_path
 
+def resolve_output_size(spec):
+    """
+    Work out the pixel size of an output spec.
+    
+    A spec either gives an explicit 'size' of (width, height), or an 'aspect'
+    such as '9:16' together with a 'resolution' for the short side (default 1080).
+    Both dimensions are rounded to even numbers as required by libx264.
+    
+    Returns:
+        tuple: (width, height) in pixels
+    """
+    if 'size' in spec:
+        width, height = spec['size']
+    else:
+        aspect_w, aspect_h = (float(v) for v in spec.get('aspect', '16:9').split(':'))
+        short_side = spec.get('resolution', 1080)
+        if aspect_w >= aspect_h:
+            width, height = short_side * aspect_w / aspect_h, short_side
+        else:
+            width, height = short_side, short_side * aspect_h / aspect_w
+    return int(round(width / 2)) * 2, int(round(height / 2)) * 2
+
+def create_multi_format_videos(audio_path, output_specs, fps=30, video_duration=None,
+                               segment_length=0.1, first_ten_seconds=False,
+                               visualization='waveform', audio_bitrate='192k'):
+    """
+    Render one visualization into several videos in a single pass.
+    
+    The audio is decoded once, the per-frame visualization data is computed
+    once per frame and rasterized into every output (redrawing only the
+    animated artists over a cached background), and the soundtrack is
+    encoded to AAC once and muxed into each video without re-encoding.
+    
+    Args:
+        audio_path (str): Path to input audio file
+        output_specs (list): One dict per output video with keys:
+            'output_path' (str, required), 'size' ((width, height)) or
+            'aspect' (e.g. '9:16') with 'resolution' (short side in pixels),
+            'background_color' (default 'black'), 'color' (default '#00AAFF')
+            and 'bitrate' (e.g. '8000k', default lets ffmpeg choose)
+        fps (int): Frames per second for the output videos
+        video_duration (float): Duration of video in seconds (defaults to audio length)
+        segment_length (float): Length of audio segment to visualize in seconds
+        first_ten_seconds (bool): If True, only output the first 10 seconds
+        visualization (str): 'waveform', 'bars', 'spectrogram' or 'radial'
+        audio_bitrate (str): Bitrate of the shared AAC soundtrack
+    
+    Returns:
+        list: Paths of the created videos
+    """
+    if not output_specs:
+        raise ValueError("At least one output spec is required")
+    for spec in output_specs:
+        if not spec.get('output_path'):
+            raise ValueError("Every output spec needs an 'output_path'")
+    
+    y, sr, _, video_duration = load_audio(
+        audio_path, video_duration=video_duration, first_ten_seconds=first_ten_seconds)
+    
+    # Precompute the visualization data once for every output
+    get_frame_data = build_frame_data(y, sr, fps, visualization=visualization,
+                                      segment_length=segment_length)
+    
+    temp_dir = tempfile.mkdtemp()
+    figures = []
+    targets = []
+    try:
+        # Encode the soundtrack once
+        print("Encoding shared AAC soundtrack...")
+        audio_file = os.path.join(temp_dir, "soundtrack.m4a")
+        audio_clip = AudioFileClip(audio_path)
+        if video_duration < audio_clip.duration:
+            audio_clip = audio_clip.subclip(0, video_duration)
+        audio_clip.write_audiofile(audio_file, codec='aac', bitrate=audio_bitrate)
+        try:
+            audio_clip.close()
+        except:
+            # In some moviepy versions, clips might not have a close() method
+            pass
+        
+        # Set up one figure and one video writer per output
+        dpi = 100
+        for spec in output_specs:
+            width, height = resolve_output_size(spec)
+            background_color = spec.get('background_color', 'black')
+            # Matplotlib truncates figsize * dpi, so render one pixel larger and
+            # crop each frame back to the exact (even) output size
+            fig = plt.figure(figsize=((width + 1) / dpi, (height + 1) / dpi), dpi=dpi,
+                             facecolor=background_color)
+            figures.append(fig)
+            canvas_width, canvas_height = fig.canvas.get_width_height()
+            if canvas_width < width or canvas_height < height:
+                raise RuntimeError(f"Canvas {canvas_width}x{canvas_height} is smaller "
+                                   f"than output {width}x{height}")
+            ax = fig.add_axes([0, 0, 1, 1])
+            draw, artists = setup_visualization(ax, visualization,
+                                                color=spec.get('color', '#00AAFF'),
+                                                background_color=background_color)
+            render = make_frame_renderer(fig, artists)
+            writer = FFMPEG_VideoWriter(spec['output_path'], (width, height),
+                                        fps, codec='libx264', audiofile=audio_file,
+                                        bitrate=spec.get('bitrate'))
+            targets.append((draw, render, writer, width, height))
+        
+        # Compute each frame's data once and rasterize it into every output
+        total_frames = int(video_duration * fps)
+        print(f"Creating {len(targets)} video files ({total_frames} frames each)")
+        for frame in range(total_frames):
+            frame_data = get_frame_data(frame / fps)
+            for draw, render, writer, width, height in targets:
+                draw(frame_data)
+                writer.write_frame(render()[:height, :width])
+            if total_frames >= 10 and frame % (total_frames // 10) == 0:
+                print(f"  {100 * frame // total_frames}% done")
+    finally:
+        # Clean up
+        for draw, render, writer, width, height in targets:
+            writer.close()
+        for fig in figures:
+            plt.close(fig)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    output_paths = [spec['output_path'] for spec in output_specs]
+    for path in output_paths:
+        print(f"Video created successfully: {path}")
+    return output_paths
+
 def main():
     create_waveform_video(
         INPUT_AUDIO,
@@ -161,7 +490,8 @@ def main():
         video_duration=None,  # Set to None to use full audio length
         segment_length=0.1,   # Length of audio segment to display (in seconds)
         background_color='black',
-        first_ten_seconds=False  # Set to True to output only first 10 seconds
+        first_ten_seconds=False,  # Set to True to output only first 10 seconds
+        visualization='waveform'  # 'waveform', 'bars', 'spectrogram' or 'radial'
     )
 
 if __name__ == "__main__":